@@ -29,11 +29,12 @@ def run_sim(args: argparse.Namespace) -> None:
         p_ioc=args.p_ioc,
         p_fok=args.p_fok,
         snapshot_every=args.snapshot_every,
+        latency_sample_every=args.latency_sample_every,
     )
     sim = Simulator(cfg)
     art: SimArtifacts = sim.run()
     out_dir = args.report
-    paths = save_artifacts(art, out_dir)
+    paths = save_artifacts(art, out_dir, use_arrow=args.arrow_csv)
     fig_paths = plot_timeseries_metrics(art.snapshots, out_dir)
     lat_png = plot_latency_hist(art.latencies_ns, out_dir)
     summary = summarize_latency_ns(art.latencies_ns)
@@ -42,7 +43,12 @@ def run_sim(args: argparse.Namespace) -> None:
 
 
 def run_bench(args: argparse.Namespace) -> None:
-    cfg = SimConfig(seed=args.seed, n_events=args.n_events, snapshot_every=max(args.n_events // 50, 1))
+    cfg = SimConfig(
+        seed=args.seed,
+        n_events=args.n_events,
+        snapshot_every=max(args.n_events // 50, 1),
+        latency_sample_every=args.latency_sample_every,
+    )
     sim = Simulator(cfg)
     art = sim.run()
     out_dir = args.report
@@ -98,12 +104,15 @@ def main() -> None:
     p_sim.add_argument("--p-ioc", type=float, default=0.05)
     p_sim.add_argument("--p-fok", type=float, default=0.02)
     p_sim.add_argument("--snapshot-every", type=int, default=250)
+    p_sim.add_argument("--latency-sample-every", type=int, default=1)
+    p_sim.add_argument("--arrow-csv", action="store_true")
     p_sim.add_argument("--report", type=str, default="results")
     p_sim.set_defaults(func=run_sim)
 
     p_bench = sub.add_parser("bench", help="Run microbenchmark")
     p_bench.add_argument("--seed", type=int, default=30)
     p_bench.add_argument("--n-events", type=int, default=300_000)
+    p_bench.add_argument("--latency-sample-every", type=int, default=1)
     p_bench.add_argument("--report", type=str, default="results")
     p_bench.set_defaults(func=run_bench)
 
@@ -1,19 +1,61 @@
 # orderbook/core.py
 from __future__ import annotations
 
-import heapq
-from collections import deque, defaultdict
 from dataclasses import dataclass
-from typing import Deque, Dict, List, Optional, Tuple
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from sortedcontainers import SortedDict
 
 from .models import Order, Trade, Side, OrderType, TimeInForce, OrderId
 
 
 @dataclass(slots=True)
 class LevelQueue:
-    """FIFO queue at a single price level."""
-    price: float
-    orders: Deque[Order]
+    """FIFO queue at a single price level, kept as an intrusive doubly-linked list of orders."""
+    tick: int
+    head: Optional[Order] = None
+    tail: Optional[Order] = None
+    size: int = 0  # aggregate remaining qty resting at this level
+
+    def __iter__(self) -> Iterator[Order]:
+        node = self.head
+        while node is not None:
+            yield node
+            node = node.next
+
+    def append(self, order: Order) -> None:
+        tail = self.tail
+        order.prev = tail
+        order.next = None
+        self.size += order.remaining
+        if tail is None:
+            self.head = order
+        else:
+            tail.next = order
+        self.tail = order
+
+    def unlink(self, order: Order) -> None:
+        prev, nxt = order.prev, order.next
+        self.size -= order.remaining
+        if prev is None:
+            self.head = nxt
+        else:
+            prev.next = nxt
+        if nxt is None:
+            self.tail = prev
+        else:
+            nxt.prev = prev
+        order.prev = None
+        order.next = None
+
+
+_R = TypeVar("_R")
+_MARKET_BUY_TICK = 1 << 62  # limit tick for market orders: never binds
+_MARKET_SELL_TICK = -(1 << 62)
+# column lists (maker_ids, taker_ids, prices, qtys, ts) that fills are appended to
+# instead of building Trades
+TradeSink = Tuple[List[OrderId], List[OrderId], List[float], List[int], List[int]]
 
 
 class OrderBook:
@@ -25,313 +67,522 @@ class OrderBook:
       - replace/modify (price and/or qty)
       - IOC and FOK
     Data structures:
-      - dict[price]->deque FIFO per side
-      - heaps for best price discovery (lazy cleanup)
-      - id_index for locating an order's side & price level
-    Invariants (enforced via check_invariants on demand):
+      - SortedDict[tick]->LevelQueue FIFO per side (integer tick = round(price / tick_size))
+      - best price read from the ends of the SortedDict; empty levels are deleted eagerly
+      - id_index for locating an order's side, tick level & node (O(1) cancel)
+      - aggregate qty per level and per side, maintained incrementally
+    Prices are converted to ticks on entry and back to floats only when
+    emitted (trade prices, best bid/ask, levels).
+    Invariants (checked after every add/cancel/replace when check_invariants=True):
       - No crossed book (best_bid < best_ask) unless one side empty
       - FIFO within price level
       - Deterministic sequencing (integer ts increases)
     """
 
-    def __init__(self, tick_size: float = 0.01, check_invariants: bool = False) -> None:
+    def __init__(self, tick_size: float = 0.01, check_invariants: bool = False, record_trades: bool = False) -> None:
         self.tick: float = tick_size
-        self._bids: Dict[float, Deque[Order]] = defaultdict(deque)
-        self._asks: Dict[float, Deque[Order]] = defaultdict(deque)
-        self._bid_heap: List[float] = []  # store negative prices for max-heap behavior
-        self._ask_heap: List[float] = []  # store positive prices (min-heap)
-        self._id_index: Dict[OrderId, Tuple[Side, float]] = {}  # id -> (side, price)
+        # ticks -> price divides by this (exact integer for decimal ticks) so 9999 -> 99.99, not 99.99000000000001
+        per_unit = 1.0 / tick_size
+        self._ticks_per_unit: float = float(round(per_unit)) if abs(per_unit - round(per_unit)) < 1e-9 else per_unit
+        self._bids: SortedDict[int, LevelQueue] = SortedDict()  # best bid = last key
+        self._asks: SortedDict[int, LevelQueue] = SortedDict()  # best ask = first key
+        self._id_index: Dict[OrderId, Tuple[Side, int, Order]] = {}  # id -> (side, tick, order)
+        # resting ids in a dense list (swap-with-last removal) for O(1) uniform sampling
+        self._live_ids: List[OrderId] = []
+        self._live_pos: Dict[OrderId, int] = {}
+        self._bid_total: int = 0
+        self._ask_total: int = 0
         self._seq: int = 0
-        self._check: bool = check_invariants
-        self.trades: List[Trade] = []
-
-    def _best_bid_price(self) -> Optional[float]:
-        while self._bid_heap:
-            p = -self._bid_heap[0]
-            if p in self._bids and self._bids[p]:
-                return p
-            heapq.heappop(self._bid_heap)  # stale
-        return None
-
-    def _best_ask_price(self) -> Optional[float]:
-        while self._ask_heap:
-            p = self._ask_heap[0]
-            if p in self._asks and self._asks[p]:
-                return p
-            heapq.heappop(self._ask_heap)  # stale
-        return None
+        self._dispatch: Dict[Tuple[OrderType, TimeInForce], Callable[[Order, int, Optional[TradeSink]], List[Trade]]] = {
+            (OrderType.LIMIT, TimeInForce.GTC): self._add_limit,
+            (OrderType.LIMIT, TimeInForce.IOC): self._add_limit_ioc,
+            (OrderType.LIMIT, TimeInForce.FOK): self._add_limit_fok,
+            (OrderType.MARKET, TimeInForce.GTC): self._add_market,
+            (OrderType.MARKET, TimeInForce.IOC): self._add_market_ioc,
+            (OrderType.MARKET, TimeInForce.FOK): self._add_market,
+        }
+        self._record_trades: bool = record_trades
+        self.trades: List[Trade] = []  # full trade log, only filled when record_trades=True
+        if check_invariants:
+            # debug books wrap the mutators; release books pay nothing per call
+            self.add = self._checked(self.add)  # type: ignore[method-assign]
+            self.cancel = self._checked(self.cancel)  # type: ignore[method-assign]
+            self.replace = self._checked(self.replace)  # type: ignore[method-assign]
+            self.replace_by_delta = self._checked(self.replace_by_delta)  # type: ignore[method-assign]
+            self.add_primitives = self._checked(self.add_primitives)  # type: ignore[method-assign]
+
+    def _checked(self, op: Callable[..., _R]) -> Callable[..., _R]:
+        @wraps(op)
+        def checked_op(*args: Any, **kwargs: Any) -> _R:
+            result = op(*args, **kwargs)
+            self.assert_invariants()
+            return result
+        return checked_op
+
+    def _to_tick(self, price: float) -> int:
+        return int(round(price / self.tick))
+
+    def _best_bid_price(self) -> Optional[int]:
+        if not self._bids:
+            return None
+        tick: int = self._bids.peekitem(-1)[0]
+        return tick
+
+    def _best_ask_price(self) -> Optional[int]:
+        if not self._asks:
+            return None
+        tick: int = self._asks.peekitem(0)[0]
+        return tick
+
+    def _peek_best_bid(self) -> Optional[Tuple[int, LevelQueue]]:
+        if not self._bids:
+            return None
+        best: Tuple[int, LevelQueue] = self._bids.peekitem(-1)
+        return best
+
+    def _peek_best_ask(self) -> Optional[Tuple[int, LevelQueue]]:
+        if not self._asks:
+            return None
+        best: Tuple[int, LevelQueue] = self._asks.peekitem(0)
+        return best
 
     def best_bid(self) -> Optional[float]:
-        return self._best_bid_price()
+        t = self._best_bid_price()
+        return None if t is None else t / self._ticks_per_unit
 
     def best_ask(self) -> Optional[float]:
-        return self._best_ask_price()
+        t = self._best_ask_price()
+        return None if t is None else t / self._ticks_per_unit
+
+    def add(self, order: Order, trade_sink: Optional[TradeSink] = None) -> List[Trade]:
+        """
+        Match and/or rest an order; returns the resulting trades.
+        With a trade_sink, fills are appended to its columns instead and the returned list is empty.
+        """
+        if order.order_type is OrderType.LIMIT:
+            assert order.price is not None  # validated by Order for LIMIT orders
+            limit_tick = self._to_tick(order.price)
+        else:
+            limit_tick = _MARKET_BUY_TICK if order.side is Side.BUY else _MARKET_SELL_TICK
+        return self._add_at(order, limit_tick, trade_sink)
 
-    def add(self, order: Order) -> List[Trade]:
+    def _add_at(self, order: Order, limit_tick: int, sink: Optional[TradeSink]) -> List[Trade]:
+        # limit_tick is the order's price in ticks (market orders: the side's sentinel)
         self._seq += 1
         order.ts = self._seq
-        if order.remaining is None:
-            order.remaining = order.qty
+        return self._dispatch[(order.order_type, order.tif)](order, limit_tick, sink)
 
+    def add_primitives(
+        self,
+        order_id: OrderId,
+        side: Side,
+        qty: int,
+        price_ticks: Optional[int],
+        order_type: OrderType,
+        tif: TimeInForce = TimeInForce.GTC,
+        trade_sink: Optional[TradeSink] = None,
+    ) -> List[Trade]:
+        """
+        add() for trusted callers holding raw fields: price is given in integer ticks (None for MARKET)
+        and the order is built positionally without validation. The tick is matched on as given;
+        the float price is only derived for the Order record.
+        """
+        if order_type is OrderType.LIMIT:
+            if price_ticks is None:
+                raise ValueError("LIMIT order requires price_ticks")
+            price = price_ticks / self._ticks_per_unit
+            order = Order.unchecked(order_id, side, qty, price, order_type, tif)
+            return self._add_at(order, price_ticks, trade_sink)
+        order = Order.unchecked(order_id, side, qty, None, order_type, tif)
+        market_tick = _MARKET_BUY_TICK if side is Side.BUY else _MARKET_SELL_TICK
+        return self._add_at(order, market_tick, trade_sink)
+
+    def add_batch(
+        self,
+        ids: Iterable[Any],
+        sides: Iterable[Any],
+        prices: Iterable[Any],
+        qtys: Iterable[Any],
+        order_type: OrderType = OrderType.LIMIT,
+        tif: TimeInForce = TimeInForce.GTC,
+    ) -> List[Trade]:
+        """
+        Add orders given as equal-length parallel columns (lists or numpy arrays; sides as Side
+        or +1/-1), in order; returns all trades.
+        """
+        add = self.add
         trades: List[Trade] = []
-        if order.order_type is OrderType.MARKET:
-            trades = self._execute_market(order)
-        else:
-            trades = self._execute_limit_against_opposite(order)
-            if order.is_active and order.tif is not TimeInForce.IOC and order.tif is not TimeInForce.FOK:
-                self._rest_limit(order)
-            elif order.tif is TimeInForce.FOK and order.is_active:
-                order.remaining = 0
-        if self._check:
-            self.assert_invariants()
+        for oid, side, price, qty in zip(ids, sides, prices, qtys, strict=True):
+            side_enum = side if isinstance(side, Side) else Side(int(side))
+            trades.extend(add(Order(int(oid), side_enum, int(qty), float(price), order_type, tif)))
+        return trades
+
+    def _add_limit(self, order: Order, limit_tick: int, sink: Optional[TradeSink]) -> List[Trade]:
+        trades = self._take(order, limit_tick, False, sink)
+        if order.remaining > 0:
+            self._rest_limit(order, limit_tick)
         return trades
 
+    def _add_limit_ioc(self, order: Order, limit_tick: int, sink: Optional[TradeSink]) -> List[Trade]:
+        return self._take(order, limit_tick, True, sink)
+
+    def _add_limit_fok(self, order: Order, limit_tick: int, sink: Optional[TradeSink]) -> List[Trade]:
+        if self._executable_available(order, limit_tick) < order.remaining:
+            order.remaining = 0
+            return []
+        trades = self._take(order, limit_tick, False, sink)
+        order.remaining = 0
+        return trades
+
+    def _add_market(self, order: Order, limit_tick: int, sink: Optional[TradeSink]) -> List[Trade]:
+        return self._take(order, limit_tick, False, sink)
+
+    def _add_market_ioc(self, order: Order, limit_tick: int, sink: Optional[TradeSink]) -> List[Trade]:
+        return self._take(order, limit_tick, True, sink)
+
+    def _take(
+        self, order: Order, limit_tick: int, is_ioc: bool, sink: Optional[TradeSink]
+    ) -> List[Trade]:
+        if order.side is Side.BUY:
+            return self._take_from_asks(order, limit_tick, is_ioc, sink)
+        return self._take_from_bids(order, limit_tick, is_ioc, sink)
+
     def cancel(self, order_id: OrderId) -> int:
-        idx = self._id_index.get(order_id)
-        if idx is None:
-            return 0
-        side, price = idx
-        book = self._bids if side is Side.BUY else self._asks
-        q = book.get(price)
-        if not q:
-            self._id_index.pop(order_id, None)
+        entry = self._extract_entry(order_id)
+        if entry is None:
             return 0
-        canceled = 0
-        new_q: Deque[Order] = deque()
-        found = False
-        while q:
-            o = q.popleft()
-            if o.id == order_id and not found:
-                canceled = o.remaining or 0
-                o.remaining = 0
-                found = True
-            else:
-                new_q.append(o)
-        if new_q:
-            book[price] = new_q
-        else:
-            book.pop(price, None)
-        self._id_index.pop(order_id, None)
-        if self._check:
-            self.assert_invariants()
+        removed = entry[2]
+        canceled = removed.remaining
+        removed.remaining = 0
         return canceled
 
-    def replace(self, order_id: OrderId, new_price: Optional[float] = None, new_qty: Optional[int] = None, new_tif: Optional[TimeInForce] = None) -> Tuple[bool, List[Trade]]:
-        idx = self._id_index.get(order_id)
-        if idx is None:
-            return (False, [])
-        side, _price = idx
-        removed = self._extract_order(order_id)
-        if removed is None:
+    def replace(
+        self,
+        order_id: OrderId,
+        new_price: Optional[float] = None,
+        new_qty: Optional[int] = None,
+        new_tif: Optional[TimeInForce] = None,
+        trade_sink: Optional[TradeSink] = None,
+    ) -> Tuple[bool, List[Trade]]:
+        entry = self._extract_entry(order_id)
+        if entry is None:
             return (False, [])
+        removed = entry[2]
+        side = removed.side
         price = removed.price if new_price is None else new_price
-        remaining = removed.remaining or 0
+        remaining = removed.remaining
         if new_qty is not None:
             if new_qty <= 0:
                 return (False, [])
-            already_filled = removed.qty - (removed.remaining or 0)
+            already_filled = removed.qty - removed.remaining
             if new_qty < already_filled:
                 remaining = 0
             else:
                 remaining = new_qty - already_filled
         tif = removed.tif if new_tif is None else new_tif
-        new_order = Order(
-            id=order_id,
-            side=side,
-            qty=(removed.qty if new_qty is None else new_qty),
-            price=price,
-            order_type=(OrderType.LIMIT if price is not None else OrderType.MARKET),
-            tif=tif,
-            remaining=remaining,
+        # unchecked: remaining may legitimately be 0 here (new qty at or below the filled qty)
+        new_order = Order.unchecked(
+            order_id,
+            side,
+            removed.qty if new_qty is None else new_qty,
+            price,
+            OrderType.LIMIT if price is not None else OrderType.MARKET,
+            tif,
+            remaining,
         )
-        trades = self.add(new_order)
+        trades = self.add(new_order, trade_sink)
         return (True, trades)
 
-    def _extract_order(self, order_id: OrderId) -> Optional[Order]:
-        idx = self._id_index.get(order_id)
+    def replace_by_delta(
+        self, order_id: OrderId, delta_ticks: int, trade_sink: Optional[TradeSink] = None
+    ) -> Tuple[bool, List[Trade]]:
+        """Move a resting limit order by delta_ticks (losing time priority); qty and TIF are kept."""
+        entry = self._extract_entry(order_id)
+        if entry is None:
+            return (False, [])
+        _side, tick, removed = entry
+        new_tick = tick + delta_ticks
+        new_order = Order.unchecked(
+            order_id,
+            removed.side,
+            removed.qty,
+            new_tick / self._ticks_per_unit,
+            OrderType.LIMIT,
+            removed.tif,
+            removed.remaining,
+        )
+        trades = self._add_at(new_order, new_tick, trade_sink)
+        return (True, trades)
+
+    def _extract_entry(self, order_id: OrderId) -> Optional[Tuple[Side, int, Order]]:
+        """Unlink a resting order from its level; returns its (side, tick, order) index entry."""
+        idx = self._drop_id(order_id)
         if idx is None:
             return None
-        side, price = idx
-        book = self._bids if side is Side.BUY else self._asks
-        q = book.get(price)
-        if not q:
-            self._id_index.pop(order_id, None)
-            return None
-        new_q: Deque[Order] = deque()
-        target: Optional[Order] = None
-        while q:
-            o = q.popleft()
-            if o.id == order_id and target is None:
-                target = o
-            else:
-                new_q.append(o)
-        if new_q:
-            book[price] = new_q
+        side, tick, order = idx
+        if side is Side.BUY:
+            book = self._bids
+            self._bid_total -= order.remaining
         else:
-            book.pop(price, None)
-        self._id_index.pop(order_id, None)
-        return target
+            book = self._asks
+            self._ask_total -= order.remaining
+        level = book[tick]
+        level.unlink(order)
+        if level.head is None:
+            del book[tick]
+        return idx
 
-    def _rest_limit(self, order: Order) -> None:
-        price = float(order.price)
+    def _rest_limit(self, order: Order, tick: int) -> None:
         if order.side is Side.BUY:
-            if price not in self._bids or not self._bids[price]:
-                heapq.heappush(self._bid_heap, -price)
-            self._bids[price].append(order)
+            book = self._bids
+            self._bid_total += order.remaining
         else:
-            if price not in self._asks or not self._asks[price]:
-                heapq.heappush(self._ask_heap, price)
-            self._asks[price].append(order)
-        self._id_index[order.id] = (order.side, price)
+            book = self._asks
+            self._ask_total += order.remaining
+        level = book.get(tick)
+        if level is None:
+            level = book[tick] = LevelQueue(tick)
+        level.append(order)
+        self._id_index[order.id] = (order.side, tick, order)
+        self._live_pos[order.id] = len(self._live_ids)
+        self._live_ids.append(order.id)
 
-    def _execute_market(self, order: Order) -> List[Trade]:
-        if order.side is Side.BUY:
-            return self._take_from_asks(order, limit_price=None, tif=order.tif)
-        else:
-            return self._take_from_bids(order, limit_price=None, tif=order.tif)
+    def _drop_id(self, order_id: OrderId) -> Optional[Tuple[Side, int, Order]]:
+        idx = self._id_index.pop(order_id, None)
+        if idx is not None:
+            pos = self._live_pos.pop(order_id)
+            last = self._live_ids.pop()
+            if last != order_id:
+                self._live_ids[pos] = last
+                self._live_pos[last] = pos
+        return idx
 
-    def _execute_limit_against_opposite(self, order: Order) -> List[Trade]:
-        trades: List[Trade] = []
-        if order.tif is TimeInForce.FOK:
-            need = order.remaining or 0
-            available = self._executable_available(order)
-            if available < need:
-                order.remaining = 0
-                return []
-        if order.side is Side.BUY:
-            trades = self._take_from_asks(order, limit_price=float(order.price), tif=order.tif)
-        else:
-            trades = self._take_from_bids(order, limit_price=float(order.price), tif=order.tif)
-        return trades
+    def random_resting_id(self, u: float) -> Optional[OrderId]:
+        """Resting order id chosen by a uniform draw u in [0, 1); None if the book is empty."""
+        live = self._live_ids
+        if not live:
+            return None
+        return live[int(u * len(live))]
 
-    def _executable_available(self, order: Order) -> int:
-        remaining = order.remaining or 0
-        side = order.side
-        if side is Side.BUY:
-            limit = float(order.price) if order.order_type is OrderType.LIMIT else float("inf")
-            total = 0
-            asks = sorted(self._asks.keys())
-            for p in asks:
-                if p > limit:
-                    break
-                q = sum(o.remaining or 0 for o in self._asks[p])
-                total += q
-                if total >= remaining:
-                    return total
-            return total
+    def _executable_available(self, order: Order, limit: int) -> int:
+        remaining = order.remaining
+        if order.side is Side.BUY:
+            peek = self._peek_best_ask()
+            if peek is None or peek[0] > limit:
+                return 0
+            best, level = peek
+            book = self._asks
+            total = level.size
+            if total >= remaining:
+                return total  # common case: the top level alone covers the order
+            ticks = book.irange(best, limit, inclusive=(False, True))
         else:
-            limit = float(order.price) if order.order_type is OrderType.LIMIT else 0.0
-            total = 0
-            bids = sorted(self._bids.keys(), reverse=True)
-            for p in bids:
-                if p < limit:
-                    break
-                q = sum(o.remaining or 0 for o in self._bids[p])
-                total += q
-                if total >= remaining:
-                    return total
-            return total
+            peek = self._peek_best_bid()
+            if peek is None or peek[0] < limit:
+                return 0
+            best, level = peek
+            book = self._bids
+            total = level.size
+            if total >= remaining:
+                return total
+            ticks = book.irange(limit, best, inclusive=(True, False), reverse=True)
+        for t in ticks:
+            q: LevelQueue = book[t]
+            total += q.size
+            if total >= remaining:
+                return total
+        return total
 
-    def _take_from_asks(self, order: Order, limit_price: Optional[float], tif: TimeInForce) -> List[Trade]:
+    def _take_from_asks(
+        self, order: Order, limit_tick: int, is_ioc: bool, sink: Optional[TradeSink]
+    ) -> List[Trade]:
         trades: List[Trade] = []
-        while order.is_active:
-            best = self._best_ask_price()
-            if best is None:
+        remaining = order.remaining
+        start = remaining
+        taker_id = order.id
+        per_unit = self._ticks_per_unit
+        seq = self._seq
+        record = self.trades.append if self._record_trades else None
+        if sink is not None:
+            makers, takers, prices, qtys, tss = sink
+            sink_maker = makers.append
+            sink_taker = takers.append
+            sink_price = prices.append
+            sink_qty = qtys.append
+            sink_ts = tss.append
+        drop_id = self._drop_id
+        # best price is looked up once per level; the inner loop drains that level
+        while remaining > 0:
+            peek = self._peek_best_ask()
+            if peek is None:
                 break
-            if limit_price is not None and best > limit_price:
+            best, level = peek
+            if best > limit_tick:
                 break
-            level = self._asks.get(best)
-            if not level:
-                heapq.heappop(self._ask_heap)
-                continue
-            while order.is_active and level:
-                maker = level[0]
-                maker_remaining = maker.remaining or 0
-                take_qty = min(order.remaining or 0, maker_remaining)
-                if take_qty <= 0:
-                    break
+            price = best / per_unit
+            while level.head is not None:
+                maker = level.head
+                maker_remaining = maker.remaining
+                take_qty = remaining if remaining < maker_remaining else maker_remaining
                 maker.remaining = maker_remaining - take_qty
-                order.remaining = (order.remaining or 0) - take_qty
-                self._seq += 1
-                trade = Trade(maker_id=maker.id, taker_id=order.id, price=best, qty=take_qty, ts=self._seq)
-                self.trades.append(trade)
-                trades.append(trade)
-                if maker.remaining == 0:
-                    level.popleft()
-                    self._id_index.pop(maker.id, None)
-            if not level:
-                self._asks.pop(best, None)
-        if tif is TimeInForce.IOC:
-            order.remaining = 0
+                level.size -= take_qty
+                remaining -= take_qty
+                seq += 1
+                if sink is None:
+                    trade = Trade(maker.id, taker_id, price, take_qty, seq)
+                    trades.append(trade)
+                    if record is not None:
+                        record(trade)
+                else:
+                    sink_maker(maker.id)
+                    sink_taker(taker_id)
+                    sink_price(price)
+                    sink_qty(take_qty)
+                    sink_ts(seq)
+                    if record is not None:
+                        record(Trade(maker.id, taker_id, price, take_qty, seq))
+                if take_qty == maker_remaining:
+                    # pop the filled maker off the head (inlined LevelQueue.unlink)
+                    nxt = maker.next
+                    level.head = nxt
+                    if nxt is None:
+                        level.tail = None
+                    else:
+                        nxt.prev = None
+                        maker.next = None
+                    drop_id(maker.id)
+                if remaining == 0:
+                    break
+            if level.head is None:
+                del self._asks[best]
+        self._seq = seq
+        self._ask_total -= start - remaining
+        order.remaining = 0 if is_ioc else remaining
         return trades
 
-    def _take_from_bids(self, order: Order, limit_price: Optional[float], tif: TimeInForce) -> List[Trade]:
+    def _take_from_bids(
+        self, order: Order, limit_tick: int, is_ioc: bool, sink: Optional[TradeSink]
+    ) -> List[Trade]:
         trades: List[Trade] = []
-        while order.is_active:
-            best = self._best_bid_price()
-            if best is None:
+        remaining = order.remaining
+        start = remaining
+        taker_id = order.id
+        per_unit = self._ticks_per_unit
+        seq = self._seq
+        record = self.trades.append if self._record_trades else None
+        if sink is not None:
+            makers, takers, prices, qtys, tss = sink
+            sink_maker = makers.append
+            sink_taker = takers.append
+            sink_price = prices.append
+            sink_qty = qtys.append
+            sink_ts = tss.append
+        drop_id = self._drop_id
+        # best price is looked up once per level; the inner loop drains that level
+        while remaining > 0:
+            peek = self._peek_best_bid()
+            if peek is None:
                 break
-            if limit_price is not None and best < limit_price:
+            best, level = peek
+            if best < limit_tick:
                 break
-            level = self._bids.get(best)
-            if not level:
-                heapq.heappop(self._bid_heap)
-                continue
-            while order.is_active and level:
-                maker = level[0]
-                maker_remaining = maker.remaining or 0
-                take_qty = min(order.remaining or 0, maker_remaining)
-                if take_qty <= 0:
-                    break
+            price = best / per_unit
+            while level.head is not None:
+                maker = level.head
+                maker_remaining = maker.remaining
+                take_qty = remaining if remaining < maker_remaining else maker_remaining
                 maker.remaining = maker_remaining - take_qty
-                order.remaining = (order.remaining or 0) - take_qty
-                self._seq += 1
-                trade = Trade(maker_id=maker.id, taker_id=order.id, price=best, qty=take_qty, ts=self._seq)
-                self.trades.append(trade)
-                trades.append(trade)
-                if maker.remaining == 0:
-                    level.popleft()
-                    self._id_index.pop(maker.id, None)
-            if not level:
-                self._bids.pop(best, None)
-        if tif is TimeInForce.IOC:
-            order.remaining = 0
+                level.size -= take_qty
+                remaining -= take_qty
+                seq += 1
+                if sink is None:
+                    trade = Trade(maker.id, taker_id, price, take_qty, seq)
+                    trades.append(trade)
+                    if record is not None:
+                        record(trade)
+                else:
+                    sink_maker(maker.id)
+                    sink_taker(taker_id)
+                    sink_price(price)
+                    sink_qty(take_qty)
+                    sink_ts(seq)
+                    if record is not None:
+                        record(Trade(maker.id, taker_id, price, take_qty, seq))
+                if take_qty == maker_remaining:
+                    # pop the filled maker off the head (inlined LevelQueue.unlink)
+                    nxt = maker.next
+                    level.head = nxt
+                    if nxt is None:
+                        level.tail = None
+                    else:
+                        nxt.prev = None
+                        maker.next = None
+                    drop_id(maker.id)
+                if remaining == 0:
+                    break
+            if level.head is None:
+                del self._bids[best]
+        self._seq = seq
+        self._bid_total -= start - remaining
+        order.remaining = 0 if is_ioc else remaining
         return trades
 
-    def depth_at_price(self, side: Side, price: float) -> int:
+    def depth_at_tick(self, side: Side, tick: int) -> int:
         book = self._bids if side is Side.BUY else self._asks
-        return sum((o.remaining or 0) for o in book.get(price, deque()))
+        level = book.get(tick)
+        return 0 if level is None else level.size
+
+    def depth_at_price(self, side: Side, price: float) -> int:
+        return self.depth_at_tick(side, self._to_tick(price))
 
     def total_depth(self, side: Side) -> int:
-        book = self._bids if side is Side.BUY else self._asks
-        return sum((o.remaining or 0) for q in book.values() for o in q)
+        return self._bid_total if side is Side.BUY else self._ask_total
 
     def levels(self, side: Side) -> List[Tuple[float, int]]:
+        per_unit = self._ticks_per_unit
         if side is Side.BUY:
-            keys = sorted(self._bids.keys(), reverse=True)
-            return [(p, self.depth_at_price(Side.BUY, p)) for p in keys]
-        keys = sorted(self._asks.keys())
-        return [(p, self.depth_at_price(Side.SELL, p)) for p in keys]
+            return [(t / per_unit, lvl.size) for t, lvl in reversed(self._bids.items())]
+        return [(t / per_unit, lvl.size) for t, lvl in self._asks.items()]
 
     def assert_invariants(self) -> None:
+        assert len(self._live_ids) == len(self._id_index), "live id list out of sync"
+        for pos, oid in enumerate(self._live_ids):
+            assert oid in self._id_index and self._live_pos[oid] == pos, f"live id {oid} misplaced"
         bb = self._best_bid_price()
         ba = self._best_ask_price()
         if bb is not None and ba is not None:
-            assert bb < ba, f"Crossed book: best_bid={bb} best_ask={ba}"
-        for p, q in self._bids.items():
+            assert bb < ba, f"Crossed book: best_bid={bb * self.tick} best_ask={ba * self.tick}"
+        bid_total = 0
+        for t, q in self._bids.items():
+            assert q.head is not None, f"Empty level left at BID {t * self.tick}"
             last_ts = -1
+            level_size = 0
             for o in q:
-                assert o.ts >= last_ts, f"FIFO violated at BID {p}"
+                assert o.ts >= last_ts, f"FIFO violated at BID {t * self.tick}"
                 last_ts = o.ts
-        for p, q in self._asks.items():
+                level_size += o.remaining
+            assert q.size == level_size, f"Level size drift at BID {t * self.tick}"
+            bid_total += level_size
+        assert self._bid_total == bid_total, "BID total depth drift"
+        ask_total = 0
+        for t, q in self._asks.items():
+            assert q.head is not None, f"Empty level left at ASK {t * self.tick}"
             last_ts = -1
+            level_size = 0
             for o in q:
-                assert o.ts >= last_ts, f"FIFO violated at ASK {p}"
+                assert o.ts >= last_ts, f"FIFO violated at ASK {t * self.tick}"
                 last_ts = o.ts
+                level_size += o.remaining
+            assert q.size == level_size, f"Level size drift at ASK {t * self.tick}"
+            ask_total += level_size
+        assert self._ask_total == ask_total, "ASK total depth drift"
 
     def snapshot_top(self) -> Tuple[Optional[float], Optional[float], int, int]:
-        bb = self._best_bid_price()
-        ba = self._best_ask_price()
-        bid_depth = self.depth_at_price(Side.BUY, bb) if bb is not None else 0
-        ask_depth = self.depth_at_price(Side.SELL, ba) if ba is not None else 0
-        return (bb, ba, bid_depth, ask_depth)
+        bid = self._peek_best_bid()
+        ask = self._peek_best_ask()
+        return (
+            None if bid is None else bid[0] / self._ticks_per_unit,
+            None if ask is None else ask[0] / self._ticks_per_unit,
+            0 if bid is None else bid[1].size,
+            0 if ask is None else ask[1].size,
+        )
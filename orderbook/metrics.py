@@ -17,23 +17,40 @@ class SeriesMetrics:
     imbalance: pd.Series
 
 
+def _ffill_index(valid: np.ndarray) -> np.ndarray:
+    """Index of the last valid row at or before each row; gathering with it is Series.ffill()."""
+    idx = np.where(valid, np.arange(valid.size), 0)
+    np.maximum.accumulate(idx, out=idx)
+    return idx
+
+
 def l1_metrics_from_snapshots(df: pd.DataFrame) -> SeriesMetrics:
-    best_bid = df["best_bid"].astype(float)
-    best_ask = df["best_ask"].astype(float)
-    spread = (best_ask - best_bid).fillna(method="ffill")
-    mid = ((best_ask + best_bid) / 2.0).fillna(method="ffill")
-    bid_depth = df["bid_depth"].astype(float)
-    ask_depth = df["ask_depth"].astype(float)
+    # float64 columns come back as views; only the int depth columns are cast
+    best_bid = df["best_bid"].to_numpy(dtype=np.float64, copy=False)
+    best_ask = df["best_ask"].to_numpy(dtype=np.float64, copy=False)
+    bid_depth = df["bid_depth"].to_numpy(dtype=np.float64)
+    ask_depth = df["ask_depth"].to_numpy(dtype=np.float64)
+    spread = best_ask - best_bid
+    mid = 0.5 * (best_ask + best_bid)
+    # spread and mid are NaN on the same rows (either side empty): fill both from one index
+    fill = _ffill_index(~np.isnan(spread))
+    spread = spread[fill]
+    mid = mid[fill]
     imbalance = (bid_depth - ask_depth) / (bid_depth + ask_depth + 1e-9)
-    return SeriesMetrics(spread=spread, mid=mid, bid_depth=bid_depth, ask_depth=ask_depth, imbalance=imbalance)
+    index = df.index
+    return SeriesMetrics(
+        spread=pd.Series(spread, index=index),
+        mid=pd.Series(mid, index=index),
+        bid_depth=pd.Series(bid_depth, index=index, name="bid_depth"),
+        ask_depth=pd.Series(ask_depth, index=index, name="ask_depth"),
+        imbalance=pd.Series(imbalance, index=index),
+    )
 
 
 def summarize_latency_ns(latencies: np.ndarray) -> Dict[str, float]:
     if latencies.size == 0:
         return {"p50_ns": 0.0, "p90_ns": 0.0, "p99_ns": 0.0, "ops_per_sec": 0.0}
-    p50 = float(np.percentile(latencies, 50))
-    p90 = float(np.percentile(latencies, 90))
-    p99 = float(np.percentile(latencies, 99))
+    p50, p90, p99 = (float(q) for q in np.percentile(latencies, [50, 90, 99]))
     mean_ns = float(latencies.mean())
     ops = 1e9 / mean_ns if mean_ns > 0 else 0.0
     return {"p50_ns": p50, "p90_ns": p90, "p99_ns": p99, "ops_per_sec": ops}
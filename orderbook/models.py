@@ -1,9 +1,9 @@
 # orderbook/models.py
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum, auto
-from typing import Optional
+from typing import ClassVar, Optional, Tuple
 
 
 class Side(Enum):
@@ -36,6 +36,7 @@ class Order:
     - remaining: current outstanding quantity
     - price: float price for LIMIT, None for MARKET
     - ts: deterministic sequence number (integer monotone)
+    - prev/next: intrusive links owned by the book's price-level queue
     """
     id: OrderId
     side: Side
@@ -44,7 +45,11 @@ class Order:
     order_type: OrderType
     tif: TimeInForce = TimeInForce.GTC
     ts: int = 0
-    remaining: Optional[int] = None
+    remaining: int = 0  # 0 on construction means "same as qty"
+    prev: Optional[Order] = field(default=None, init=False, repr=False, compare=False)
+    next: Optional[Order] = field(default=None, init=False, repr=False, compare=False)
+
+    FIELDS: ClassVar[Tuple[str, ...]] = ("id", "side", "qty", "price", "order_type", "tif", "ts", "remaining")
 
     def __post_init__(self) -> None:
         if self.qty <= 0:
@@ -53,15 +58,43 @@ class Order:
             raise ValueError("LIMIT order requires price")
         if self.order_type is OrderType.MARKET and self.price is not None:
             raise ValueError("MARKET order must have price=None")
-        if self.remaining is None:
+        if self.remaining == 0:
             self.remaining = self.qty
 
+    @classmethod
+    def unchecked(
+        cls,
+        id: OrderId,
+        side: Side,
+        qty: int,
+        price: Optional[float],
+        order_type: OrderType,
+        tif: TimeInForce = TimeInForce.GTC,
+        remaining: Optional[int] = None,
+    ) -> Order:
+        """Build an order without __post_init__ validation (trusted generators only)."""
+        o = object.__new__(cls)
+        o.id = id
+        o.side = side
+        o.qty = qty
+        o.price = price
+        o.order_type = order_type
+        o.tif = tif
+        o.ts = 0
+        o.remaining = qty if remaining is None else remaining
+        o.prev = None
+        o.next = None
+        return o
+
     @property
     def is_active(self) -> bool:
-        return (self.remaining or 0) > 0
+        return self.remaining > 0
+
+    def as_tuple(self) -> Tuple[OrderId, Side, int, Optional[float], OrderType, TimeInForce, int, int]:
+        """Field values in FIELDS order; a cheap row for tabular export (no asdict/deepcopy)."""
+        return (self.id, self.side, self.qty, self.price, self.order_type, self.tif, self.ts, self.remaining)
 
 
-@dataclass(slots=True)
 class Trade:
     """
     Trade record emitted by matching engine.
@@ -70,9 +103,31 @@ class Trade:
     price: execution price (price of resting order for LIMIT/marketable)
     qty: executed quantity
     ts: engine sequence for determinism
+    Plain __slots__ class with a positional __init__: one is built per fill.
     """
-    maker_id: OrderId
-    taker_id: OrderId
-    price: float
-    qty: int
-    ts: int
+    __slots__ = ("maker_id", "taker_id", "price", "qty", "ts")
+    FIELDS: ClassVar[Tuple[str, ...]] = __slots__
+
+    def __init__(self, maker_id: OrderId, taker_id: OrderId, price: float, qty: int, ts: int) -> None:
+        self.maker_id = maker_id
+        self.taker_id = taker_id
+        self.price = price
+        self.qty = qty
+        self.ts = ts
+
+    def as_tuple(self) -> Tuple[OrderId, OrderId, float, int, int]:
+        """Field values in FIELDS order; a cheap row for tabular export."""
+        return (self.maker_id, self.taker_id, self.price, self.qty, self.ts)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Trade):
+            return NotImplemented
+        return self.as_tuple() == other.as_tuple()
+
+    __hash__ = None  # type: ignore[assignment]  # mutable value type, unhashable like the former dataclass
+
+    def __repr__(self) -> str:
+        return (
+            f"Trade(maker_id={self.maker_id!r}, taker_id={self.taker_id!r}, "
+            f"price={self.price!r}, qty={self.qty!r}, ts={self.ts!r})"
+        )
@@ -2,16 +2,23 @@
 from __future__ import annotations
 
 import math
-import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from time import perf_counter_ns
+from typing import Dict, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 
-from .core import OrderBook
-from .models import Order, OrderType, Side, TimeInForce, Trade
+try:  # optional fast CSV writer: pip install "orderbook-simulator[arrow]"
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+    pa_csv = None
+
+from .core import OrderBook, TradeSink
+from .models import OrderType, Side, TimeInForce, Trade
 
 
 @dataclass(slots=True)
@@ -31,176 +38,292 @@ class SimConfig:
     p_ioc: float = 0.05
     p_fok: float = 0.02
     snapshot_every: int = 250
+    latency_sample_every: int = 1  # time 1 in k book operations (1 = every operation)
+
+    def __post_init__(self) -> None:
+        if self.latency_sample_every < 1:
+            raise ValueError("latency_sample_every must be >= 1")
 
 
 @dataclass(slots=True)
 class SimArtifacts:
     trades: pd.DataFrame
-    snapshots: pd.DataFrame
+    snapshot_records: np.ndarray  # structured array of SNAP_DTYPE
     latencies_ns: np.ndarray
     order_count: int
     cancel_count: int
     replace_count: int
+    _snapshots: Optional[pd.DataFrame] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def snapshots(self) -> pd.DataFrame:
+        """L1 snapshots as a DataFrame, built from snapshot_records on first access."""
+        if self._snapshots is None:
+            self._snapshots = pd.DataFrame(self.snapshot_records)
+        return self._snapshots
+
+
+@dataclass(slots=True)
+class EventBatch:
+    """Pre-generated per-event random draws, one array entry per simulated event."""
+    kind_r: np.ndarray  # uniform draw selecting limit/market/cancel/replace
+    is_buy: np.ndarray
+    qty: np.ndarray
+    limit_tick: np.ndarray  # int64 price in ticks
+    tif: np.ndarray  # index into _TIFS
+    delta_ticks: np.ndarray  # +/-1 price move for replace events
+    pick_r: np.ndarray  # uniform draw choosing the resting order a cancel/replace targets
+
+
+_TIFS = (TimeInForce.FOK, TimeInForce.IOC, TimeInForce.GTC)
+SNAP_DTYPE = np.dtype(
+    [("event", "i8"), ("best_bid", "f8"), ("best_ask", "f8"), ("bid_depth", "i8"), ("ask_depth", "i8")]
+)
+_TRADE_COLUMNS = list(Trade.FIELDS)
+_TRADE_DTYPES = (np.int64, np.int64, np.float64, np.int64, np.int64)
 
 
 class Simulator:
+    """
+    Event-driven market simulator around an OrderBook.
+
+    filled_qty is an int64 array indexed by order id (index 0 unused) holding each order's total
+    filled quantity as maker or taker. It is populated once, at the end of run(), and is empty
+    before that; filled_qty_by_id() gives the same data as a {order_id: qty} dict of filled orders.
+    """
+
     def __init__(self, cfg: SimConfig) -> None:
         self.cfg = cfg
-        self.rs = np.random.RandomState(cfg.seed)
+        self.rng = np.random.default_rng(cfg.seed)
         self.next_id = 1
         self.book = OrderBook(tick_size=cfg.tick_size, check_invariants=False)
         self.queue_ahead: Dict[int, int] = {}
-        self.filled_qty: Dict[int, int] = {}
-
-    def _gen_size(self) -> int:
-        size = max(int(self.rs.lognormal(mean=math.log(self.cfg.size_mean), sigma=0.5)), self.cfg.size_min)
-        return int(round(size / 10.0) * 10)
-
-    def _side(self) -> Side:
-        return Side.BUY if self.rs.rand() < 0.5 else Side.SELL
-
-    def _limit_price_near_mid(self, mid: float, side: Side) -> float:
-        ticks = int(round(self.rs.normal(loc=1.0 if side is Side.BUY else -1.0, scale=self.cfg.sigma_ticks)))
-        px = mid + ticks * self.cfg.tick_size
-        return max(self.cfg.tick_size, round(px / self.cfg.tick_size) * self.cfg.tick_size)
-
-    def _pick_tif(self) -> TimeInForce:
-        r = self.rs.rand()
-        if r < self.cfg.p_fok:
-            return TimeInForce.FOK
-        if r < self.cfg.p_fok + self.cfg.p_ioc:
-            return TimeInForce.IOC
-        return TimeInForce.GTC
-
-    def _initial_queue_ahead(self, side: Side, price: float) -> int:
-        if side is Side.BUY:
-            depth = self.book.depth_at_price(Side.BUY, price)
-        else:
-            depth = self.book.depth_at_price(Side.SELL, price)
-        return depth
+        self.filled_qty: np.ndarray = np.zeros(0, dtype=np.int64)  # filled qty indexed by order id
+
+    def _gen_sizes(self, n: int) -> np.ndarray:
+        sizes = np.maximum(
+            self.rng.lognormal(mean=math.log(self.cfg.size_mean), sigma=0.5, size=n).astype(np.int64),
+            self.cfg.size_min,
+        )
+        return (np.round(sizes / 10.0) * 10).astype(np.int64)
+
+    def _limit_ticks_near_mid(self, mid_ticks: np.ndarray, is_buy: np.ndarray) -> np.ndarray:
+        loc = np.where(is_buy, 1.0, -1.0)
+        offsets = np.rint(self.rng.normal(loc=loc, scale=self.cfg.sigma_ticks))
+        ticks: np.ndarray = np.maximum(1, np.rint(mid_ticks + offsets)).astype(np.int64)
+        return ticks
+
+    def _pick_tifs(self, n: int) -> np.ndarray:
+        # 0 -> FOK, 1 -> IOC, 2 -> GTC (index into _TIFS)
+        thresholds = [self.cfg.p_fok, self.cfg.p_fok + self.cfg.p_ioc]
+        return np.searchsorted(thresholds, self.rng.random(n), side="right")
+
+    def _generate_events(self, n: int) -> EventBatch:
+        cfg = self.cfg
+        kind_r = self.rng.random(n)
+        is_buy = self.rng.random(n) < 0.5
+        # mid in (fractional) ticks; prices stay integer ticks until handed to the book
+        mid_ticks = round(cfg.mid0 / cfg.tick_size) + np.arange(1, n + 1) * (cfg.drift_per_1k / 1000.0)
+        return EventBatch(
+            kind_r=kind_r,
+            is_buy=is_buy,
+            qty=self._gen_sizes(n),
+            limit_tick=self._limit_ticks_near_mid(mid_ticks, is_buy),
+            tif=self._pick_tifs(n),
+            delta_ticks=self.rng.choice([-1, 1], size=n),
+            pick_r=self.rng.random(n),
+        )
 
     def run(self) -> SimArtifacts:
         cfg = self.cfg
-        rs = self.rs
-        latencies: List[int] = []
-        mid = cfg.mid0
+        self._seed_initial_levels(cfg.mid0, base_qty=200, rounds=10)
+
+        ev = self._generate_events(cfg.n_events)
+        trade_cols, latencies, snap_records = self._run_loop(ev)
+
+        trades_df = pd.DataFrame(
+            {
+                name: np.array(col, dtype=dt)
+                for name, col, dt in zip(_TRADE_COLUMNS, trade_cols, _TRADE_DTYPES, strict=True)
+            }
+        )
+        self._accumulate_fills(trades_df)
+        return SimArtifacts(
+            trades=trades_df,
+            snapshot_records=snap_records,
+            latencies_ns=latencies,
+            order_count=self.next_id - 1,
+            cancel_count=0,
+            replace_count=0,
+        )
+
+    def _run_loop(self, ev: EventBatch) -> Tuple[TradeSink, np.ndarray, np.ndarray]:
+        """
+        Replay a pre-generated event batch against the book.
+        Takes only arrays in and hands arrays/lists back, so the loop body can be
+        swapped for a compiled kernel without touching run().
+        """
+        cfg = self.cfg
+        sample_every = cfg.latency_sample_every
+        # sized for the most timed ops possible (ceil(n / k)); written by cursor and returned
+        # as the [:n_lat] view, so there is no per-op append and no final copy
+        latencies = np.empty(-(-cfg.n_events // sample_every), dtype=np.int64)
+        n_lat = 0
+
+        # fills go straight into columns; no Trade objects are built in the loop
+        sink: TradeSink = ([], [], [], [], [])
+        n_snaps = cfg.n_events // cfg.snapshot_every
+        snaps = np.empty(n_snaps, dtype=SNAP_DTYPE)
 
-        trades: List[Trade] = []
-        snaps: List[Tuple[int, Optional[float], Optional[float], int, int]] = []
+        kind_r = ev.kind_r.tolist()
+        sides = [Side.BUY if b else Side.SELL for b in ev.is_buy.tolist()]
+        qtys = ev.qty.tolist()
+        limit_ticks = ev.limit_tick.tolist()
+        tifs = [_TIFS[c] for c in ev.tif.tolist()]
+        delta_ticks = ev.delta_ticks.tolist()
+        pick_r = ev.pick_r.tolist()
 
-        for k in range(10):
-            self._seed_initial_levels(mid, base_qty=200)
+        perf = perf_counter_ns
+        book = self.book
+        book_add = book.add_primitives
+        book_cancel = book.cancel
+        book_replace_by_delta = book.replace_by_delta
+        random_resting_id = book.random_resting_id
+        depth_at_tick = book.depth_at_tick
+        queue_ahead = self.queue_ahead
+        next_id = self.next_id
+        snapshot_every = cfg.snapshot_every
+        until_snap = snapshot_every
+        n_snap = 0
+        until_sample = 1
+        # cumulative kind thresholds; branches below run in frequency order (limit > market > cancel > replace)
+        t_limit = cfg.p_limit
+        t_market = t_limit + cfg.p_market
+        t_cancel = t_market + cfg.p_cancel
 
         for i in range(cfg.n_events):
-            r = rs.rand()
-            mid += (cfg.drift_per_1k / 1000.0) * self.cfg.tick_size
-
-            if r < cfg.p_limit:
-                side = self._side()
-                price = self._limit_price_near_mid(mid, side)
-                tif = self._pick_tif()
-                qty = self._gen_size()
-                oid = self.next_id
-                self.next_id += 1
-                order = Order(id=oid, side=side, qty=qty, price=price, order_type=OrderType.LIMIT, tif=tif)
+            r = kind_r[i]
+            until_sample -= 1
+            timed = until_sample == 0
+            if timed:
+                until_sample = sample_every
+
+            if r < t_limit:
+                side = sides[i]
+                tif = tifs[i]
+                oid = next_id
+                next_id += 1
                 if tif is TimeInForce.GTC:
-                    self.queue_ahead[oid] = self._initial_queue_ahead(side, price)
-                t0 = time.perf_counter_ns()
-                new_trades = self.book.add(order)
-                dt = time.perf_counter_ns() - t0
-                latencies.append(dt)
-                trades.extend(new_trades)
-                for tr in new_trades:
-                    self.filled_qty[tr.maker_id] = self.filled_qty.get(tr.maker_id, 0) + tr.qty
-                    self.filled_qty[tr.taker_id] = self.filled_qty.get(tr.taker_id, 0) + tr.qty
-
-            elif r < cfg.p_limit + cfg.p_market:
-                side = self._side()
-                qty = self._gen_size()
-                oid = self.next_id
-                self.next_id += 1
-                order = Order(id=oid, side=side, qty=qty, price=None, order_type=OrderType.MARKET, tif=TimeInForce.IOC)
-                t0 = time.perf_counter_ns()
-                new_trades = self.book.add(order)
-                dt = time.perf_counter_ns() - t0
-                latencies.append(dt)
-                trades.extend(new_trades)
-                for tr in new_trades:
-                    self.filled_qty[tr.maker_id] = self.filled_qty.get(tr.maker_id, 0) + tr.qty
-                    self.filled_qty[tr.taker_id] = self.filled_qty.get(tr.taker_id, 0) + tr.qty
-
-            elif r < cfg.p_limit + cfg.p_market + cfg.p_cancel:
-                victim = self._random_resting_id()
+                    queue_ahead[oid] = depth_at_tick(side, limit_ticks[i])
+                if timed:
+                    t0 = perf()
+                    book_add(oid, side, qtys[i], limit_ticks[i], OrderType.LIMIT, tif, sink)
+                    latencies[n_lat] = perf() - t0
+                    n_lat += 1
+                else:
+                    book_add(oid, side, qtys[i], limit_ticks[i], OrderType.LIMIT, tif, sink)
+
+            elif r < t_market:
+                oid = next_id
+                next_id += 1
+                if timed:
+                    t0 = perf()
+                    book_add(oid, sides[i], qtys[i], None, OrderType.MARKET, TimeInForce.IOC, sink)
+                    latencies[n_lat] = perf() - t0
+                    n_lat += 1
+                else:
+                    book_add(oid, sides[i], qtys[i], None, OrderType.MARKET, TimeInForce.IOC, sink)
+
+            elif r < t_cancel:
+                victim = random_resting_id(pick_r[i])
                 if victim is not None:
-                    t0 = time.perf_counter_ns()
-                    _canceled = self.book.cancel(victim)
-                    dt = time.perf_counter_ns() - t0
-                    latencies.append(dt)
+                    if timed:
+                        t0 = perf()
+                        _canceled = book_cancel(victim)
+                        latencies[n_lat] = perf() - t0
+                        n_lat += 1
+                    else:
+                        _canceled = book_cancel(victim)
 
             else:
-                victim = self._random_resting_id()
+                victim = random_resting_id(pick_r[i])
                 if victim is not None:
-                    side, price = self.book._id_index[victim]
-                    delta_ticks = int(self.rs.choice([-1, 1]))
-                    new_price = price + delta_ticks * cfg.tick_size
-                    t0 = time.perf_counter_ns()
-                    _ok, new_trades = self.book.replace(victim, new_price=new_price)
-                    dt = time.perf_counter_ns() - t0
-                    latencies.append(dt)
-                    trades.extend(new_trades)
-                    for tr in new_trades:
-                        self.filled_qty[tr.maker_id] = self.filled_qty.get(tr.maker_id, 0) + tr.qty
-                        self.filled_qty[tr.taker_id] = self.filled_qty.get(tr.taker_id, 0) + tr.qty
-
-            if (i + 1) % cfg.snapshot_every == 0:
-                bb, ba, bd, ad = self.book.snapshot_top()
-                snaps.append((i + 1, bb, ba, bd, ad))
-
-        trades_df = pd.DataFrame(list(map(__import__('dataclasses').asdict, trades)))
-        snap_df = pd.DataFrame(snaps, columns=["event", "best_bid", "best_ask", "bid_depth", "ask_depth"])
-        return SimArtifacts(
-            trades=trades_df,
-            snapshots=snap_df,
-            latencies_ns=np.array(latencies, dtype=np.int64),
-            order_count=self.next_id - 1,
-            cancel_count=0,
-            replace_count=0,
-        )
+                    if timed:
+                        t0 = perf()
+                        book_replace_by_delta(victim, delta_ticks[i], sink)
+                        latencies[n_lat] = perf() - t0
+                        n_lat += 1
+                    else:
+                        book_replace_by_delta(victim, delta_ticks[i], sink)
+
+            until_snap -= 1
+            if until_snap == 0:
+                until_snap = snapshot_every
+                bb, ba, bd, ad = book.snapshot_top()
+                snaps[n_snap] = (i + 1, math.nan if bb is None else bb, math.nan if ba is None else ba, bd, ad)
+                n_snap += 1
+
+        self.next_id = next_id
+        return sink, latencies[:n_lat], snaps
+
+    def filled_qty_by_id(self) -> Dict[int, int]:
+        """Filled quantity per order id, for orders with at least one fill (valid after run())."""
+        ids = np.flatnonzero(self.filled_qty)
+        return dict(zip(ids.tolist(), self.filled_qty[ids].tolist(), strict=True))
+
+    def _accumulate_fills(self, trades_df: pd.DataFrame) -> None:
+        # one vectorized pass over the trade columns instead of two dict updates per fill
+        if self.filled_qty.size < self.next_id:  # ids are dense and < next_id
+            grown = np.zeros(self.next_id, dtype=np.int64)
+            grown[: self.filled_qty.size] = self.filled_qty
+            self.filled_qty = grown
+        qty = trades_df["qty"].to_numpy(dtype=np.int64)
+        np.add.at(self.filled_qty, trades_df["maker_id"].to_numpy(dtype=np.int64), qty)
+        np.add.at(self.filled_qty, trades_df["taker_id"].to_numpy(dtype=np.int64), qty)
+
+    def _seed_initial_levels(self, mid: float, base_qty: int = 100, rounds: int = 1) -> None:
+        # `rounds` passes of bid/ask pairs at mid -/+ 1..3 ticks, entered as one batch
+        tick = self.cfg.tick_size
+        mid_tick = round(mid / tick)
+        n = 6 * rounds
+        sides = np.tile(np.array([1, -1], dtype=np.int64), n // 2)
+        dist = np.tile(np.repeat(np.arange(1, 4, dtype=np.int64), 2), rounds)
+        ids = np.arange(self.next_id, self.next_id + n, dtype=np.int64)
+        self.book.add_batch(ids, sides, (mid_tick - sides * dist) * tick, np.full(n, base_qty, dtype=np.int64))
+        self.next_id += n
+
+
+def _write_csv(df: pd.DataFrame, path: Path, use_arrow: bool) -> None:
+    if use_arrow and pa_csv is not None:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        with open(path, "wb") as f:
+            # header written by hand: Arrow always quotes header names
+            f.write((",".join(df.columns) + "\n").encode())
+            pa_csv.write_csv(table, f, write_options=pa_csv.WriteOptions(include_header=False))
+    else:
+        df.to_csv(path, index=False)
+
 
-    def _random_resting_id(self) -> Optional[int]:
-        if not self.book._id_index:
-            return None
-        keys = list(self.book._id_index.keys())
-        k = self.rs.randint(0, len(keys))
-        return keys[k]
-
-    def _seed_initial_levels(self, mid: float, base_qty: int = 100) -> None:
-        for d in range(1, 4):
-            bid_px = round(mid - d * self.cfg.tick_size, 2)
-            ask_px = round(mid + d * self.cfg.tick_size, 2)
-            b = Order(id=self.next_id, side=Side.BUY, qty=base_qty, price=bid_px, order_type=OrderType.LIMIT)
-            self.next_id += 1
-            a = Order(id=self.next_id, side=Side.SELL, qty=base_qty, price=ask_px, order_type=OrderType.LIMIT)
-            self.next_id += 1
-            self.book.add(b)
-            self.book.add(a)
-
-
-def save_artifacts(art: SimArtifacts, out_dir: str) -> Dict[str, str]:
+def save_artifacts(art: SimArtifacts, out_dir: str, use_arrow: bool = False) -> Dict[str, str]:
+    """
+    Write trades/snapshots/latencies CSVs with pandas.
+    use_arrow=True switches to pyarrow's faster CSV writer when installed; its files hold the same
+    values but are not byte-identical (e.g. integral floats are written as 100, not 100.0).
+    """
     ts = pd.Timestamp.utcnow().strftime("%Y%m%d_%H%M%S")
     base = Path(out_dir)
     (base / "figures").mkdir(parents=True, exist_ok=True)
     files = {}
     trades_path = base / f"trades_{ts}.csv"
-    art.trades.to_csv(trades_path, index=False)
+    _write_csv(art.trades, trades_path, use_arrow)
     files["trades_csv"] = str(trades_path)
 
     snaps_path = base / f"snapshots_{ts}.csv"
-    art.snapshots.to_csv(snaps_path, index=False)
+    _write_csv(art.snapshots, snaps_path, use_arrow)
     files["snapshots_csv"] = str(snaps_path)
 
     lat_path = base / f"latencies_{ts}.csv"
-    pd.DataFrame({"latency_ns": art.latencies_ns}).to_csv(lat_path, index=False)
+    _write_csv(pd.DataFrame({"latency_ns": art.latencies_ns}), lat_path, use_arrow)
     files["latencies_csv"] = str(lat_path)
 
     return files
@@ -4,62 +4,58 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Dict
 
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
+from matplotlib.figure import Figure
 
 from .metrics import SeriesMetrics, l1_metrics_from_snapshots
 
 
+def _save(fig: Figure, path: Path) -> str:
+    fig.tight_layout()
+    fig.savefig(path)
+    return str(path)
+
+
 def plot_timeseries_metrics(snaps: pd.DataFrame, out_dir: str) -> Dict[str, str]:
+    # one off-screen Figure (Agg canvas, no pyplot state) reused for every PNG
     paths: Dict[str, str] = {}
     metrics = l1_metrics_from_snapshots(snaps)
 
     figdir = Path(out_dir) / "figures"
     figdir.mkdir(parents=True, exist_ok=True)
 
-    plt.figure()
-    metrics.spread.plot(title="Spread (L1)")
-    p = figdir / "spread.png"
-    plt.xlabel("snapshot")
-    plt.ylabel("price")
-    plt.tight_layout()
-    plt.savefig(p)
-    plt.close()
-    paths["spread_png"] = str(p)
-
-    plt.figure()
-    metrics.mid.plot(title="Midprice")
-    p = figdir / "midprice.png"
-    plt.xlabel("snapshot")
-    plt.ylabel("price")
-    plt.tight_layout()
-    plt.savefig(p)
-    plt.close()
-    paths["midprice_png"] = str(p)
-
-    plt.figure()
-    metrics.bid_depth.plot(label="bid_depth")
-    metrics.ask_depth.plot(label="ask_depth")
-    plt.legend()
-    plt.title("L1 Depths")
-    plt.xlabel("snapshot")
-    plt.ylabel("shares")
-    p = figdir / "depths.png"
-    plt.tight_layout()
-    plt.savefig(p)
-    plt.close()
-    paths["depths_png"] = str(p)
-
-    plt.figure()
-    metrics.imbalance.plot(title="Order Book Imbalance")
-    plt.xlabel("snapshot")
-    plt.ylabel("imbalance")
-    p = figdir / "imbalance.png"
-    plt.tight_layout()
-    plt.savefig(p)
-    plt.close()
-    paths["imbalance_png"] = str(p)
+    fig = Figure()
+    ax = fig.subplots()
+
+    ax.plot(metrics.spread.to_numpy())
+    ax.set_title("Spread (L1)")
+    ax.set_xlabel("snapshot")
+    ax.set_ylabel("price")
+    paths["spread_png"] = _save(fig, figdir / "spread.png")
+
+    ax.cla()
+    ax.plot(metrics.mid.to_numpy())
+    ax.set_title("Midprice")
+    ax.set_xlabel("snapshot")
+    ax.set_ylabel("price")
+    paths["midprice_png"] = _save(fig, figdir / "midprice.png")
+
+    ax.cla()
+    ax.plot(metrics.bid_depth.to_numpy(), label="bid_depth")
+    ax.plot(metrics.ask_depth.to_numpy(), label="ask_depth")
+    ax.legend()
+    ax.set_title("L1 Depths")
+    ax.set_xlabel("snapshot")
+    ax.set_ylabel("shares")
+    paths["depths_png"] = _save(fig, figdir / "depths.png")
+
+    ax.cla()
+    ax.plot(metrics.imbalance.to_numpy())
+    ax.set_title("Order Book Imbalance")
+    ax.set_xlabel("snapshot")
+    ax.set_ylabel("imbalance")
+    paths["imbalance_png"] = _save(fig, figdir / "imbalance.png")
 
     return paths
 
@@ -67,14 +63,11 @@ def plot_timeseries_metrics(snaps: pd.DataFrame, out_dir: str) -> Dict[str, str]
 def plot_latency_hist(latencies_ns: np.ndarray, out_dir: str) -> str:
     figdir = Path(out_dir) / "figures"
     figdir.mkdir(parents=True, exist_ok=True)
-    plt.figure()
+    fig = Figure()
+    ax = fig.subplots()
     us = latencies_ns / 1_000.0
-    plt.hist(us, bins=50)
-    plt.title("Operation Latency Histogram (μs)")
-    plt.xlabel("latency (μs)")
-    plt.ylabel("count")
-    p = figdir / "latency_hist.png"
-    plt.tight_layout()
-    plt.savefig(p)
-    plt.close()
-    return str(p)
+    ax.hist(us, bins=50)
+    ax.set_title("Operation Latency Histogram (μs)")
+    ax.set_xlabel("latency (μs)")
+    ax.set_ylabel("count")
+    return _save(fig, figdir / "latency_hist.png")
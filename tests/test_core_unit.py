@@ -2,10 +2,12 @@
 from __future__ import annotations
 
 import math
+
+import numpy as np
 import pytest
 
 from orderbook.core import OrderBook
-from orderbook.models import Order, OrderType, Side, TimeInForce
+from orderbook.models import Order, OrderType, Side, TimeInForce, Trade
 
 
 def test_limit_matching_partial_fill():
@@ -66,3 +68,189 @@ def test_fok_requires_full_available():
     trades = ob.add(fok)
     assert len(trades) == 0
     assert ob.depth_at_price(Side.SELL, 10.0) == 50
+
+
+def test_prices_snap_to_tick_grid():
+    ob = OrderBook(tick_size=0.01)
+    ob.add(Order(id=1, side=Side.SELL, qty=10, price=10.0, order_type=OrderType.LIMIT))
+    ob.add(Order(id=2, side=Side.SELL, qty=20, price=10.000000001, order_type=OrderType.LIMIT))
+    assert ob.depth_at_price(Side.SELL, 10.0) == 30
+    assert len(ob.levels(Side.SELL)) == 1
+
+
+def test_cancel_middle_of_level_keeps_fifo():
+    ob = OrderBook(check_invariants=True)
+    for oid in (1, 2, 3):
+        ob.add(Order(id=oid, side=Side.SELL, qty=10, price=10.0, order_type=OrderType.LIMIT))
+    assert ob.cancel(2) == 10
+    assert ob.cancel(2) == 0
+    trades = ob.add(Order(id=4, side=Side.BUY, qty=20, price=10.0, order_type=OrderType.LIMIT))
+    assert [t.maker_id for t in trades] == [1, 3]
+    assert ob.best_ask() is None
+
+
+def test_aggregate_depth_tracks_fills_and_cancels():
+    ob = OrderBook(check_invariants=True)
+    ob.add(Order(id=1, side=Side.SELL, qty=40, price=10.0, order_type=OrderType.LIMIT))
+    ob.add(Order(id=2, side=Side.SELL, qty=60, price=10.01, order_type=OrderType.LIMIT))
+    ob.add(Order(id=3, side=Side.BUY, qty=50, price=10.01, order_type=OrderType.LIMIT))
+    assert ob.total_depth(Side.SELL) == 50
+    assert ob.depth_at_price(Side.SELL, 10.01) == 50
+    ob.cancel(2)
+    assert ob.total_depth(Side.SELL) == 0
+    assert ob.total_depth(Side.BUY) == 0
+
+
+def test_best_prices_across_wide_tick_range():
+    ob = OrderBook(check_invariants=True)
+    ob.add(Order(id=1, side=Side.SELL, qty=10, price=100.0, order_type=OrderType.LIMIT))
+    ob.add(Order(id=2, side=Side.BUY, qty=10, price=10.0, order_type=OrderType.LIMIT))
+    ob.add(Order(id=3, side=Side.BUY, qty=10, price=0.5, order_type=OrderType.LIMIT))
+    assert ob.best_bid() == 10.0
+    assert ob.best_ask() == 100.0
+    ob.cancel(2)
+    assert ob.best_bid() == 0.5
+
+
+def test_far_away_level_keeps_top_of_book_cheap():
+    ob = OrderBook(check_invariants=True)
+    ob.add(Order(id=1, side=Side.SELL, qty=10, price=1e9, order_type=OrderType.LIMIT))
+    for oid in range(2, 502):
+        ob.add(Order(id=oid, side=Side.BUY, qty=10, price=99.0 + (oid % 7) * 0.01, order_type=OrderType.LIMIT))
+        assert ob.best_ask() == 1e9
+        ob.cancel(oid)
+    assert ob.best_bid() is None
+    trades = ob.add(Order(id=999, side=Side.BUY, qty=4, price=None, order_type=OrderType.MARKET))
+    assert [(t.maker_id, t.price) for t in trades] == [(1, 1e9)]
+
+
+def test_fok_fills_across_levels_within_limit():
+    ob = OrderBook(check_invariants=True)
+    ob.add(Order(id=1, side=Side.BUY, qty=30, price=10.02, order_type=OrderType.LIMIT))
+    ob.add(Order(id=2, side=Side.BUY, qty=30, price=10.01, order_type=OrderType.LIMIT))
+    ob.add(Order(id=3, side=Side.BUY, qty=30, price=10.00, order_type=OrderType.LIMIT))
+    too_big = Order(id=4, side=Side.SELL, qty=70, price=10.01, order_type=OrderType.LIMIT, tif=TimeInForce.FOK)
+    assert ob.add(too_big) == []
+    fok = Order(id=5, side=Side.SELL, qty=50, price=10.01, order_type=OrderType.LIMIT, tif=TimeInForce.FOK)
+    assert sum(t.qty for t in ob.add(fok)) == 50
+    assert ob.total_depth(Side.BUY) == 40
+
+
+def test_replace_qty_below_filled_removes_order():
+    ob = OrderBook(check_invariants=True)
+    ob.add(Order(id=1, side=Side.SELL, qty=100, price=10.0, order_type=OrderType.LIMIT))
+    ob.add(Order(id=2, side=Side.BUY, qty=60, price=10.0, order_type=OrderType.LIMIT))
+    ok, trades = ob.replace(1, new_qty=50)
+    assert ok and trades == []
+    assert ob.best_ask() is None
+    assert ob.cancel(1) == 0
+
+
+def test_trade_log_is_opt_in():
+    for record in (False, True):
+        ob = OrderBook(record_trades=record)
+        ob.add(Order(id=1, side=Side.SELL, qty=10, price=10.0, order_type=OrderType.LIMIT))
+        trades = ob.add(Order(id=2, side=Side.BUY, qty=10, price=10.0, order_type=OrderType.LIMIT))
+        assert len(trades) == 1
+        assert len(ob.trades) == (1 if record else 0)
+
+
+def test_random_resting_id_tracks_live_orders():
+    ob = OrderBook(check_invariants=True)
+    assert ob.random_resting_id(0.5) is None
+    for oid in (1, 2, 3):
+        ob.add(Order(id=oid, side=Side.BUY, qty=10, price=9.9 + oid * 0.01, order_type=OrderType.LIMIT))
+    ob.cancel(1)
+    ob.add(Order(id=4, side=Side.SELL, qty=10, price=9.93, order_type=OrderType.LIMIT))
+    assert {ob.random_resting_id(u) for u in (0.0, 0.99)} == {2}
+
+
+def test_add_batch_matches_sequential_adds():
+    ob = OrderBook(check_invariants=True)
+    trades = ob.add_batch([1, 2, 3], [1, -1, Side.BUY], [9.99, 10.01, 10.01], [10, 5, 8])
+    assert [(t.maker_id, t.taker_id, t.qty) for t in trades] == [(2, 3, 5)]
+    assert ob.best_bid() == 10.01 and ob.best_ask() is None
+    assert ob.total_depth(Side.BUY) == 13
+
+
+def test_add_batch_accepts_arrays_and_rejects_ragged_columns():
+    ob = OrderBook(check_invariants=True)
+    ob.add_batch(np.array([1, 2]), np.array([1, -1]), np.array([9.99, 10.01]), np.array([10, 5]))
+    assert ob.best_bid() == 9.99 and ob.best_ask() == 10.01
+    with pytest.raises(ValueError):
+        ob.add_batch([3, 4], [1], [9.98, 9.97], [1, 1])
+
+
+def test_trade_sink_collects_fill_columns():
+    ob = OrderBook(check_invariants=True)
+    ob.add(Order(id=1, side=Side.SELL, qty=30, price=10.0, order_type=OrderType.LIMIT))
+    ob.add(Order(id=2, side=Side.SELL, qty=30, price=10.01, order_type=OrderType.LIMIT))
+    sink = ([], [], [], [], [])
+    taker = Order(id=3, side=Side.BUY, qty=50, price=None, order_type=OrderType.MARKET)
+    trades = ob.add(taker, trade_sink=sink)
+    assert trades == []
+    assert sink[:4] == ([1, 2], [3, 3], [10.0, 10.01], [30, 20])
+    assert sink[4][0] < sink[4][1]
+    ok, trades = ob.replace(2, new_price=9.99, trade_sink=sink)
+    assert ok and trades == [] and len(sink[0]) == 2
+
+
+def test_as_tuple_follows_fields():
+    ob = OrderBook(record_trades=True)
+    ob.add(Order(id=1, side=Side.SELL, qty=10, price=10.0, order_type=OrderType.LIMIT))
+    taker = Order(id=2, side=Side.BUY, qty=4, price=10.0, order_type=OrderType.LIMIT)
+    (t,) = ob.add(taker)
+    assert t.as_tuple() == tuple(getattr(t, f) for f in Trade.FIELDS)
+    assert taker.as_tuple() == tuple(getattr(taker, f) for f in Order.FIELDS)
+
+
+def test_replace_by_delta_moves_order_and_loses_priority():
+    ob = OrderBook(check_invariants=True)
+    ob.add(Order(id=1, side=Side.BUY, qty=10, price=9.99, order_type=OrderType.LIMIT))
+    ob.add(Order(id=2, side=Side.BUY, qty=20, price=10.00, order_type=OrderType.LIMIT))
+    ok, trades = ob.replace_by_delta(1, 1)
+    assert ok and trades == []
+    assert ob.levels(Side.BUY) == [(10.0, 30)]
+    trades = ob.add(Order(id=3, side=Side.SELL, qty=20, price=10.0, order_type=OrderType.LIMIT))
+    assert [t.maker_id for t in trades] == [2]
+    assert ob.replace_by_delta(99, 1) == (False, [])
+
+
+def test_add_primitives_takes_integer_ticks():
+    ob = OrderBook(check_invariants=True)
+    assert ob.add_primitives(1, Side.SELL, 10, 1001, OrderType.LIMIT) == []
+    assert ob.best_ask() == 10.01
+    trades = ob.add_primitives(2, Side.BUY, 4, None, OrderType.MARKET, TimeInForce.IOC)
+    assert [(t.maker_id, t.price, t.qty) for t in trades] == [(1, 10.01, 4)]
+    with pytest.raises(ValueError):
+        ob.add_primitives(3, Side.BUY, 1, None, OrderType.LIMIT)
+
+
+def test_tick_paths_skip_price_to_tick_conversion(monkeypatch):
+    ob = OrderBook(check_invariants=True)
+
+    def no_float_round_trip(price):
+        raise AssertionError("tick path converted a price back to ticks")
+
+    monkeypatch.setattr(ob, "_to_tick", no_float_round_trip)
+    ob.add_primitives(1, Side.BUY, 10, 999, OrderType.LIMIT)
+    ob.add_primitives(2, Side.SELL, 10, 1001, OrderType.LIMIT, TimeInForce.FOK)
+    ok, _ = ob.replace_by_delta(1, 1)
+    assert ok and ob.depth_at_tick(Side.BUY, 1000) == 10
+    assert ob.best_bid() == 10.0
+
+
+def test_trade_compares_by_value():
+    assert Trade(1, 2, 1.0, 3, 4) == Trade(1, 2, 1.0, 3, 4)
+    assert Trade(1, 2, 1.0, 3, 4) != Trade(1, 2, 1.0, 3, 5)
+    with pytest.raises(TypeError):
+        hash(Trade(1, 2, 1.0, 3, 4))
+
+
+def test_tick_prices_convert_back_exactly():
+    ob = OrderBook(tick_size=0.01)
+    ob.add(Order(id=1, side=Side.BUY, qty=10, price=99.99, order_type=OrderType.LIMIT))
+    ob.add(Order(id=2, side=Side.SELL, qty=10, price=100.07, order_type=OrderType.LIMIT))
+    assert repr(ob.best_bid()) == "99.99"
+    assert repr(ob.best_ask()) == "100.07"
+    assert [repr(p) for p, _ in ob.levels(Side.BUY)] == ["99.99"]
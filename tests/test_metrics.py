@@ -1,9 +1,10 @@
 # tests/test_metrics.py
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
 
-from orderbook.metrics import l1_metrics_from_snapshots
+from orderbook.metrics import l1_metrics_from_snapshots, summarize_latency_ns
 
 
 def test_l1_metrics_basic():
@@ -20,3 +21,29 @@ def test_l1_metrics_basic():
     assert (m.spread.values == (df["best_ask"] - df["best_bid"]).values).all()
     assert (m.mid.values == ((df["best_ask"] + df["best_bid"]) / 2.0).values).all()
     assert len(m.imbalance) == 4
+
+
+def test_l1_metrics_forward_fills_empty_side():
+    df = pd.DataFrame(
+        {
+            "event": [1, 2, 3, 4],
+            "best_bid": [None, 9.9, None, 10.0],
+            "best_ask": [10.1, 10.1, 10.2, 10.2],
+            "bid_depth": [0, 100, 0, 50],
+            "ask_depth": [90, 100, 95, 105],
+        }
+    )
+    m = l1_metrics_from_snapshots(df)
+    expected_spread = (df["best_ask"] - df["best_bid"]).ffill()
+    expected_mid = ((df["best_ask"] + df["best_bid"]) / 2.0).ffill()
+    np.testing.assert_array_equal(m.spread.values, expected_spread.values)
+    np.testing.assert_array_equal(m.mid.values, expected_mid.values)
+
+
+def test_summarize_latency_ns_quantiles():
+    lat = np.arange(1, 101, dtype=np.int64)
+    s = summarize_latency_ns(lat)
+    assert s["p50_ns"] == float(np.percentile(lat, 50))
+    assert s["p99_ns"] == float(np.percentile(lat, 99))
+    assert s["ops_per_sec"] == 1e9 / lat.mean()
+    assert summarize_latency_ns(np.array([], dtype=np.int64))["p50_ns"] == 0.0
@@ -0,0 +1,70 @@
+# tests/test_sim.py
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from orderbook.sim import SNAP_DTYPE, SimConfig, Simulator, save_artifacts
+
+
+def test_run_artifact_shapes():
+    cfg = SimConfig(seed=7, n_events=2_000, snapshot_every=100)
+    art = Simulator(cfg).run()
+    assert list(art.snapshots.columns) == ["event", "best_bid", "best_ask", "bid_depth", "ask_depth"]
+    assert len(art.snapshots) == 20
+    assert art.snapshots["event"].iloc[-1] == 2_000
+    assert art.snapshot_records.dtype == SNAP_DTYPE
+    assert art.snapshots is art.snapshots  # built once, then cached
+    assert art.latencies_ns.dtype == np.int64
+    assert 0 < art.latencies_ns.size <= cfg.n_events
+    assert list(art.trades.columns) == ["maker_id", "taker_id", "price", "qty", "ts"]
+
+
+def test_latency_sampling_times_one_in_k_operations():
+    full = Simulator(SimConfig(seed=7, n_events=2_000)).run()
+    sampled = Simulator(SimConfig(seed=7, n_events=2_000, latency_sample_every=10)).run()
+    assert 0 < sampled.latencies_ns.size <= 200
+    assert sampled.latencies_ns.size < full.latencies_ns.size
+    assert len(sampled.trades) == len(full.trades)
+
+
+def test_save_artifacts_defaults_to_pandas_output(tmp_path):
+    art = Simulator(SimConfig(seed=7, n_events=1_000, snapshot_every=100)).run()
+    paths = save_artifacts(art, str(tmp_path))
+    assert Path(paths["trades_csv"]).read_text() == art.trades.to_csv(index=False)
+    assert Path(paths["snapshots_csv"]).read_text() == art.snapshots.to_csv(index=False)
+
+
+def test_save_artifacts_arrow_writer_keeps_values(tmp_path):
+    pytest.importorskip("pyarrow")
+    art = Simulator(SimConfig(seed=7, n_events=1_000, snapshot_every=100)).run()
+    via_pandas = save_artifacts(art, str(tmp_path / "pandas"), use_arrow=False)
+    via_arrow = save_artifacts(art, str(tmp_path / "arrow"), use_arrow=True)
+    for key, path in via_pandas.items():
+        expected = pd.read_csv(path)
+        got = pd.read_csv(via_arrow[key])
+        assert list(got.columns) == list(expected.columns)
+        # value-level only: Arrow writes integral floats without ".0", so read-back dtypes can differ
+        pd.testing.assert_frame_equal(got, expected, check_dtype=False)
+
+
+def test_filled_qty_matches_trades():
+    sim = Simulator(SimConfig(seed=3, n_events=2_000))
+    art = sim.run()
+    assert sim.filled_qty.sum() == 2 * art.trades["qty"].sum()
+    oid = int(art.trades["maker_id"].iloc[0])
+    expected = art.trades.loc[art.trades.maker_id == oid, "qty"].sum()
+    expected += art.trades.loc[art.trades.taker_id == oid, "qty"].sum()
+    assert sim.filled_qty[oid] == expected
+    by_id = sim.filled_qty_by_id()
+    assert by_id[oid] == expected and sum(by_id.values()) == sim.filled_qty.sum()
+    assert all(qty > 0 for qty in by_id.values())
+
+
+@pytest.mark.parametrize("every", [0, -3])
+def test_latency_sample_every_must_be_positive(every):
+    with pytest.raises(ValueError):
+        SimConfig(latency_sample_every=every)